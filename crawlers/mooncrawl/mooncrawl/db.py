@@ -33,11 +33,16 @@ def yield_db_session() -> Generator[Session, None, None]:
 yield_db_session_ctx = contextmanager(yield_db_session)
 
 # pre-ping
+# Used for bulk writes of labels, so rows of executemany INSERTs are sent in large pages
+# https://docs.sqlalchemy.org/en/20/dialects/postgresql.html#psycopg2-fast-execution-helpers
 pre_ping_engine = create_moonstream_engine(
     url=MOONSTREAM_DB_URI,
     pool_size=MOONSTREAM_POOL_SIZE,
     statement_timeout=MOONSTREAM_CRAWLERS_DB_STATEMENT_TIMEOUT_MILLIS,
     pool_pre_ping=True,
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=1000,
+    executemany_batch_page_size=500,
 )
 PrePing_SessionLocal = sessionmaker(bind=pre_ping_engine)
 
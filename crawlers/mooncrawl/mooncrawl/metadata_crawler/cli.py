@@ -1,22 +1,29 @@
 import argparse
+import asyncio
 import json
 import logging
-import random
-import urllib.request
+import queue
+import re
+import threading
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional
-from urllib.error import HTTPError
+from enum import Enum
+from typing import Any, List, Optional, Tuple
 
+import aiohttp
+import diskcache  # type: ignore
+import orjson
 from moonstreamdb.blockchain import AvailableBlockchainType
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from ..db import PrePing_SessionLocal, RO_pre_ping_engine
-from ..settings import MOONSTREAM_CRAWLERS_DB_STATEMENT_TIMEOUT_MILLIS
+from ..settings import (
+    MOONSTREAM_CRAWLERS_DB_STATEMENT_TIMEOUT_MILLIS,
+    MOONSTREAM_METADATA_CACHE_DIR,
+)
 from .db import (
     clean_labels_from_db,
-    get_current_metadata_for_address,
-    get_tokens_id_wich_may_updated,
-    get_uris_of_tokens,
+    get_addresses_with_token_uris,
+    get_uris_of_tokens_needing_metadata,
     metadata_to_label,
 )
 
@@ -24,7 +31,41 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-batch_size = 50
+IPFS_GATEWAYS = ["https://ipfs.io/ipfs/", "https://cloudflare-ipfs.com/ipfs/"]
+ARWEAVE_GATEWAY = "https://arweave.net/"
+CONTENT_ADDRESSED_PREFIXES = ("ipfs://", "ar://")
+
+METADATA_MAX_SIZE_BYTES = 1_048_576
+METADATA_REQUEST_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Accept": "application/json",
+}
+
+# orjson parses integers out of 64 bit range as float, values with
+# such digit runs (uint256 ids, attributes) are parsed by json to keep them exact
+LARGE_INTEGER_PATTERN = re.compile(rb"\d{19,}")
+
+REQUEST_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.3
+
+WRITER_QUEUE_PUT_TIMEOUT_SECONDS = 1
+
+
+class WriterAction(Enum):
+    WRITE_LABELS = "write_labels"
+    CLEAN_LABELS = "clean_labels"
+
+
+# (action, address, labels) passed from fetching to writer thread
+WriterMessage = Tuple[WriterAction, str, List[Any]]
+
+_uri_cache: Optional[diskcache.Cache] = None
+try:
+    _uri_cache = diskcache.Cache(MOONSTREAM_METADATA_CACHE_DIR)
+except Exception as err:
+    logger.warning(
+        f"Unable to open metadata cache at {MOONSTREAM_METADATA_CACHE_DIR}, crawling without cache: {err}"
+    )
 
 
 @contextmanager
@@ -37,167 +78,387 @@ def yield_session_maker(engine):
         session.close()
 
 
-def leak_of_crawled_uri(
-    ids: List[Optional[str]], leak_rate: float, maybe_updated: List[Optional[str]]
-) -> List[Optional[str]]:
+def resolve_uri_mirrors(metadata_uri: str) -> List[str]:
     """
-    Leak only uri which may be updated.
+    Returns HTTP urls which serve the content of given URI.
+
+    Content addressed URIs (ipfs://, ar://) are resolved to public gateways.
     """
-    assert 0 <= leak_rate <= 1, "Leak rate must be between 0 and 1"
+    if metadata_uri.startswith("ipfs://"):
+        cid = metadata_uri[len("ipfs://") :]
+        if cid.startswith("ipfs/"):
+            cid = cid[len("ipfs/") :]
+        return [f"{gateway}{cid}" for gateway in IPFS_GATEWAYS]
+    elif metadata_uri.startswith("ar://"):
+        return [f"{ARWEAVE_GATEWAY}{metadata_uri[len('ar://') :]}"]
+    return [metadata_uri]
 
-    result = []
 
-    for id in ids:
-        if id not in maybe_updated:
-            result.append(id)
-        elif random.random() > leak_rate:
-            result.append(id)
+async def fetch_json(session: aiohttp.ClientSession, url: str) -> Any:
+    """
+    Get JSON from url, returns None if response status is not 200
+    or response is larger than METADATA_MAX_SIZE_BYTES.
+    """
+    async with session.get(url, headers=METADATA_REQUEST_HEADERS) as response:
+        if response.status != 200:
+            logger.error(f"request end with error statuscode: {response.status}")
+            return None
+
+        if (
+            response.content_length is not None
+            and response.content_length > METADATA_MAX_SIZE_BYTES
+        ):
+            logger.error(
+                f"response too large: {response.content_length} bytes for url: {url}"
+            )
+            return None
+
+        # Content is already decompressed by aiohttp, so decoded size is checked
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+            if len(body) > METADATA_MAX_SIZE_BYTES:
+                logger.error(f"response too large for url: {url}")
+                return None
+
+        return loads_metadata(body)
+
+
+def loads_metadata(body: bytes) -> Any:
+    """
+    Parse metadata JSON with orjson, falls back to json if body may contain
+    integers which do not fit into 64 bits.
+    """
+    if LARGE_INTEGER_PATTERN.search(body) is not None:
+        return json.loads(body)
+    return orjson.loads(body)
+
 
+async def race_fetch_json(session: aiohttp.ClientSession, urls: List[str]) -> Any:
+    """
+    Request all urls concurrently and return first successful result,
+    pending requests are cancelled.
+    """
+    tasks = [asyncio.ensure_future(fetch_json(session, url)) for url in urls]
+    result = None
+    try:
+        for completed in asyncio.as_completed(tasks):
+            try:
+                result = await completed
+            except Exception as err:
+                logger.error(err)
+                continue
+            if result is not None:
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
     return result
 
 
-def crawl_uri(metadata_uri: str) -> Any:
+async def crawl_uri_async(session: aiohttp.ClientSession, metadata_uri: str) -> Any:
     """
-    Get metadata from URI
+    Get metadata from URI using shared aiohttp session
     """
-    retry = 0
+    # Only content addressed data is immutable, other URIs could serve updated metadata
+    cacheable = metadata_uri.startswith(CONTENT_ADDRESSED_PREFIXES)
+
+    if cacheable and _uri_cache is not None:
+        try:
+            result = _uri_cache.get(metadata_uri)
+            if result is not None:
+                return result
+        except Exception as err:
+            logger.error(
+                f"Failed to read metadata cache for url: {metadata_uri}, {err}"
+            )
+
+    urls = resolve_uri_mirrors(metadata_uri)
     result = None
-    while retry < 3:
+    for retry in range(REQUEST_RETRIES):
+        if retry > 0:
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (retry - 1))
+        result = await race_fetch_json(session, urls)
+        if result is not None:
+            break
+        logger.error(f"request end with error for url: {metadata_uri}")
+
+    if cacheable and result is not None and _uri_cache is not None:
         try:
-            response = urllib.request.urlopen(metadata_uri, timeout=10)
+            _uri_cache.set(metadata_uri, result)
+        except Exception as err:
+            logger.error(
+                f"Failed to write metadata cache for url: {metadata_uri}, {err}"
+            )
 
-            if response.status == 200:
-                result = json.loads(response.read())
-                break
-            retry += 1
+    return result
 
-        except HTTPError as error:
-            logger.error(f"request end with error statuscode: {error.code}")
-            retry += 1
-            continue
-        except Exception as err:
-            logger.error(err)
-            logger.error(f"request end with error for url: {metadata_uri}")
-            retry += 1
+
+async def create_http_session(fetch_concurrency: int) -> aiohttp.ClientSession:
+    """
+    Create aiohttp session, must be called inside running event loop.
+
+    Session is shared by all requests of crawl, connector keeps TLS connections
+    alive and caches DNS between chunks. Each of fetch_concurrency crawled URIs
+    could race all IPFS gateways, so connector is sized for that.
+
+    Timeouts are set per socket operation, so time spent waiting for a free
+    pooled connection does not fail the request.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=fetch_concurrency * len(IPFS_GATEWAYS),
+            limit_per_host=fetch_concurrency,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        ),
+        timeout=aiohttp.ClientTimeout(sock_connect=10, sock_read=10),
+    )
+
+
+async def _fetch_all(
+    session: aiohttp.ClientSession,
+    requests_chunk: List[Any],
+    fetch_concurrency: int,
+) -> List[Any]:
+    """
+    Concurrently fetch metadata for chunk of tokens,
+    at most fetch_concurrency URIs are crawled at the same time.
+    """
+    semaphore = asyncio.Semaphore(fetch_concurrency)
+
+    async def crawl_with_semaphore(metadata_uri: str) -> Any:
+        async with semaphore:
+            return await crawl_uri_async(session, metadata_uri)
+
+    tasks = [
+        crawl_with_semaphore(token_uri_data.token_uri)
+        for token_uri_data in requests_chunk
+    ]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def labels_from_metadatas(
+    blockchain_type: AvailableBlockchainType,
+    requests_chunk: List[Any],
+    metadatas: List[Any],
+) -> List[Any]:
+    """
+    Build label models for fetched chunk, failed fetches are labeled with empty metadata.
+    """
+    labels = []
+    for token_uri_data, metadata in zip(requests_chunk, metadatas):
+        if isinstance(metadata, BaseException):
+            logger.error(
+                f"Failed to crawl uri: {token_uri_data.token_uri} with error: {metadata}"
+            )
+            metadata = None
+
+        labels.append(
+            metadata_to_label(
+                blockchain_type=blockchain_type,
+                metadata=metadata,
+                token_uri_data=token_uri_data,
+            )
+        )
+    return labels
+
+
+def write_labels_chunk(db_session: Session, address: str, labels: List[Any]) -> None:
+    """
+    Write prepared labels of chunk in one transaction.
+    """
+    try:
+        with db_session.begin():
+            db_session.bulk_save_objects(labels)
+        # trasaction is commited here
+        logger.info(f"Write {len(labels)} labels for {address}")
+    except Exception as err:
+        logger.error(err)
+        logger.error(f"Error while writing labels for address: {address}")
+        db_session.rollback()
+
+
+def clean_address_labels(
+    db_session: Session, blockchain_type: AvailableBlockchainType, address: str
+) -> None:
+    """
+    Clean outdated labels of address in separate transaction.
+    """
+    try:
+        with db_session.begin():
+            clean_labels_from_db(
+                db_session=db_session,
+                blockchain_type=blockchain_type,
+                address=address,
+            )
+    except Exception as err:
+        logger.error(err)
+        logger.error(f"Error while cleaning labels for address: {address}")
+        db_session.rollback()
+
+
+def db_writer(
+    write_queue: "queue.Queue[Optional[WriterMessage]]",
+    blockchain_type: AvailableBlockchainType,
+    writer_errors: List[Exception],
+) -> None:
+    """
+    Consume fetched chunks from queue and write them to database.
+
+    Items are (action, address, labels) tuples, CLEAN_LABELS action means
+    all chunks of address are written and its labels could be cleaned.
+    None stops the writer.
+
+    Unexpected error stops the writer and is appended to writer_errors,
+    so it could be raised in main thread.
+    """
+    try:
+        db_session = PrePing_SessionLocal()
+        try:
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    break
+
+                action, address, labels = item
+                if action == WriterAction.CLEAN_LABELS:
+                    clean_address_labels(db_session, blockchain_type, address)
+                elif len(labels) > 0:
+                    write_labels_chunk(db_session, address, labels)
+        finally:
+            db_session.close()
+    except Exception as err:
+        logger.error(f"Metadata labels writer stopped with error: {err}")
+        writer_errors.append(err)
+
+
+def put_to_writer(
+    write_queue: "queue.Queue[Optional[WriterMessage]]",
+    writer: threading.Thread,
+    writer_errors: List[Exception],
+    item: Optional[WriterMessage],
+) -> None:
+    """
+    Put item to writer queue, raises if writer thread is stopped
+    instead of blocking forever on full queue.
+    """
+    while True:
+        if not writer.is_alive():
+            cause = writer_errors[0] if len(writer_errors) > 0 else None
+            raise Exception("Metadata labels writer thread is stopped") from cause
+        try:
+            write_queue.put(item, timeout=WRITER_QUEUE_PUT_TIMEOUT_SECONDS)
+            return
+        except queue.Full:
             continue
-    return result
 
 
 def parse_metadata(
-    blockchain_type: AvailableBlockchainType, batch_size: int, max_recrawl: int
+    blockchain_type: AvailableBlockchainType,
+    commit_batch_size: int,
+    fetch_concurrency: int,
+    max_recrawl: int,
 ):
     """
     Parse all metadata of tokens.
+
+    Metadata is fetched and converted to labels in main thread while
+    previous chunk is written to database by writer thread.
+
+    Tokens are fetched by groups of at least fetch_concurrency size, so HTTP
+    fan-out could be raised without enlarging commit_batch_size transactions.
+    In-flight requests of group are bounded by fetch_concurrency.
     """
 
     logger.info("Starting metadata crawler")
     logger.info(f"Connecting to blockchain {blockchain_type.value}")
 
-    db_session = PrePing_SessionLocal()
+    # Bounded queue to not fetch far ahead of database writes
+    write_queue: "queue.Queue[Optional[WriterMessage]]" = queue.Queue(maxsize=2)
+    writer_errors: List[Exception] = []
+    writer = threading.Thread(
+        target=db_writer,
+        args=(write_queue, blockchain_type, writer_errors),
+        daemon=True,
+    )
+    writer.start()
+
+    # One event loop and http session per crawl to reuse connections between chunks
+    loop = asyncio.new_event_loop()
+    http_session = loop.run_until_complete(create_http_session(fetch_concurrency))
 
     # run crawling of levels
     with yield_session_maker(engine=RO_pre_ping_engine) as db_session_read_only:
         try:
-            # get all tokens with uri
-            logger.info("Requesting all tokens with uri from database")
-            uris_of_tokens = get_uris_of_tokens(db_session_read_only, blockchain_type)
+            logger.info("Requesting addresses with token uris from database")
+            addresses = get_addresses_with_token_uris(
+                db_session_read_only, blockchain_type
+            )
 
-            tokens_uri_by_address: Dict[str, Any] = {}
-
-            for token_uri_data in uris_of_tokens:
-                if token_uri_data.address not in tokens_uri_by_address:
-                    tokens_uri_by_address[token_uri_data.address] = []
-                tokens_uri_by_address[token_uri_data.address].append(token_uri_data)
-
-            for address in tokens_uri_by_address:
+            for address in addresses:
                 logger.info(f"Starting to crawl metadata for address: {address}")
 
-                already_parsed = get_current_metadata_for_address(
-                    db_session=db_session_read_only,
-                    blockchain_type=blockchain_type,
-                    address=address,
-                )
-
-                maybe_updated = get_tokens_id_wich_may_updated(
+                # Already parsed tokens are filtered out in database, tokens
+                # are read before fetching to not hold replica cursor open
+                address_tokens = get_uris_of_tokens_needing_metadata(
                     db_session=db_session_read_only,
                     blockchain_type=blockchain_type,
                     address=address,
-                )
-                leak_rate = 0.0
-
-                if len(maybe_updated) > 0:
-                    leak_rate = max_recrawl / len(maybe_updated)
-
-                    if leak_rate > 1:
-                        leak_rate = 1
-
-                parsed_with_leak = leak_of_crawled_uri(
-                    already_parsed, leak_rate, maybe_updated
+                    max_recrawl=max_recrawl,
                 )
 
-                logger.info(
-                    f"Leak rate: {leak_rate} for {address} with maybe updated {len(maybe_updated)}"
-                )
+                fetch_size = max(commit_batch_size, fetch_concurrency)
+
+                for i in range(0, len(address_tokens), fetch_size):
+                    requests_group = address_tokens[i : i + fetch_size]
+
+                    metadatas = loop.run_until_complete(
+                        _fetch_all(http_session, requests_group, fetch_concurrency)
+                    )
+                    # Labels are built here to keep writer transactions short
+                    labels = labels_from_metadatas(
+                        blockchain_type, requests_group, metadatas
+                    )
+                    for j in range(0, len(labels), commit_batch_size):
+                        put_to_writer(
+                            write_queue,
+                            writer,
+                            writer_errors,
+                            (
+                                WriterAction.WRITE_LABELS,
+                                address,
+                                labels[j : j + commit_batch_size],
+                            ),
+                        )
 
-                logger.info(f"Already parsed: {len(already_parsed)} for {address}")
+                logger.info(f"Crawled {len(address_tokens)} tokens for {address}")
 
-                logger.info(
-                    f"Amount of tokens for crawl: {len(tokens_uri_by_address[address])- len(parsed_with_leak)} for {address}"
+                # Clean once per address, after all chunks are written
+                put_to_writer(
+                    write_queue,
+                    writer,
+                    writer_errors,
+                    (WriterAction.CLEAN_LABELS, address, []),
                 )
 
-                # Remove already parsed tokens
-                tokens_uri_by_address[address] = [
-                    token_uri_data
-                    for token_uri_data in tokens_uri_by_address[address]
-                    if token_uri_data.token_id not in parsed_with_leak
-                ]
-
-                for requests_chunk in [
-                    tokens_uri_by_address[address][i : i + batch_size]
-                    for i in range(0, len(tokens_uri_by_address[address]), batch_size)
-                ]:
-                    writed_labels = 0
-                    db_session.commit()
-
-                    try:
-                        with db_session.begin():
-                            for token_uri_data in requests_chunk:
-                                metadata = crawl_uri(token_uri_data.token_uri)
-
-                                db_session.add(
-                                    metadata_to_label(
-                                        blockchain_type=blockchain_type,
-                                        metadata=metadata,
-                                        token_uri_data=token_uri_data,
-                                    )
-                                )
-                                writed_labels += 1
-
-                            if writed_labels > 0:
-                                clean_labels_from_db(
-                                    db_session=db_session,
-                                    blockchain_type=blockchain_type,
-                                    address=address,
-                                )
-                                logger.info(
-                                    f"Write {writed_labels} labels for {address}"
-                                )
-                        # trasaction is commited here
-                    except Exception as err:
-                        logger.error(err)
-                        logger.error(
-                            f"Error while writing labels for address: {address}"
-                        )
-                        db_session.rollback()
+        finally:
+            loop.run_until_complete(http_session.close())
+            loop.close()
 
-                clean_labels_from_db(
-                    db_session=db_session,
-                    blockchain_type=blockchain_type,
-                    address=address,
-                )
+            try:
+                put_to_writer(write_queue, writer, writer_errors, None)
+            except Exception:
+                # Writer is already stopped
+                pass
+            writer.join()
 
-        finally:
-            db_session.close()
+    # Raised only when crawl finished without error, otherwise writer error
+    # would replace the propagating one (it is chained by put_to_writer)
+    if len(writer_errors) > 0:
+        raise writer_errors[0]
 
 
 def handle_crawl(args: argparse.Namespace) -> None:
@@ -207,7 +468,12 @@ def handle_crawl(args: argparse.Namespace) -> None:
 
     blockchain_type = AvailableBlockchainType(args.blockchain)
 
-    parse_metadata(blockchain_type, args.commit_batch_size, args.max_recrawl)
+    parse_metadata(
+        blockchain_type,
+        args.commit_batch_size,
+        args.fetch_concurrency,
+        args.max_recrawl,
+    )
 
 
 def main() -> None:
@@ -234,6 +500,13 @@ def main() -> None:
         default=50,
         help="Amount of requests before commiting to database",
     )
+    metadata_crawler_parser.add_argument(
+        "--fetch-concurrency",
+        "-f",
+        type=int,
+        default=32,
+        help="Maximum amount of metadata URIs fetched simultaneously",
+    )
     metadata_crawler_parser.add_argument(
         "--max-recrawl",
         "-m",
@@ -59,102 +59,57 @@ def commit_session(db_session: Session) -> None:
         raise e
 
 
-def get_uris_of_tokens(
+def get_addresses_with_token_uris(
     db_session: Session, blockchain_type: AvailableBlockchainType
-) -> List[TokenURIs]:
+) -> List[str]:
     """
-    Get meatadata URIs.
+    Get addresses of contracts which have crawled token URIs.
     """
 
     label_model = get_label_model(blockchain_type)
 
     table = label_model.__tablename__
 
-    metadata_for_parsing = db_session.execute(
+    addresses = db_session.execute(
         text(
             """ SELECT
-            DISTINCT ON(label_data -> 'inputs'-> 0 ) label_data -> 'inputs'-> 0 as token_id,
-            label_data -> 'result' as token_uri,
-            block_number as block_number,
-            block_timestamp as block_timestamp,
-            address as address
-
+            DISTINCT address
         FROM
             {}
         WHERE
             label = :label
-            AND label_data ->> 'name' = :name
-        ORDER BY
-            label_data -> 'inputs'-> 0 ASC,
-            block_number :: INT DESC;
+            AND label_data ->> 'name' = :name;
     """.format(
                 table
             )
         ),
-        {"table": table, "label": VIEW_STATE_CRAWLER_LABEL, "name": "tokenURI"},
+        {"label": VIEW_STATE_CRAWLER_LABEL, "name": "tokenURI"},
     )
 
-    results = [
-        TokenURIs(
-            token_id=data[0],
-            token_uri=data[1][0],
-            block_number=data[2],
-            block_timestamp=data[3],
-            address=data[4],
-        )
-        for data in metadata_for_parsing
-        if data[1] is not None and len(data[1]) > 0
-    ]
-
-    return results
+    return [data[0] for data in addresses]
 
 
-def get_current_metadata_for_address(
-    db_session: Session, blockchain_type: AvailableBlockchainType, address: str
-):
-    """
-    Get existing metadata.
+def get_uris_of_tokens_needing_metadata(
+    db_session: Session,
+    blockchain_type: AvailableBlockchainType,
+    address: str,
+    max_recrawl: int,
+    yield_per: int = 1000,
+) -> List[TokenURIs]:
     """
+    Get metadata URIs of address tokens which should be crawled.
 
-    label_model = get_label_model(blockchain_type)
-
-    table = label_model.__tablename__
-
-    current_metadata = db_session.execute(
-        text(
-            """ SELECT
-            DISTINCT ON(label_data ->> 'token_id') label_data ->> 'token_id' as token_id
-        FROM
-            {}
-        WHERE
-            address = :address
-            AND label = :label
-        ORDER BY
-            label_data ->> 'token_id' ASC,
-            block_number :: INT DESC;
-    """.format(
-                table
-            )
-        ),
-        {"address": address, "label": METADATA_CRAWLER_LABEL},
-    )
-
-    result = [data[0] for data in current_metadata]
+    Rows are streamed from server side cursor by chunks of yield_per size
+    and cursor is read to the end here, so it is not kept open
+    (with its snapshot) while metadata is fetched.
 
-    return result
-
-
-def get_tokens_id_wich_may_updated(
-    db_session: Session, blockchain_type: AvailableBlockchainType, address: str
-):
-    """
-    Returns a list of tokens which may have updated information.
-
-    This function queries the database and returns all tokens that have had a transaction executed
-    on them after the latest update of their metadata, excluding transactions with names 'safeTransferFrom',
+    These are tokens without metadata labels plus random sample of at most
+    max_recrawl tokens which may have updated metadata. Token may have updated
+    metadata if it had a transaction executed on it after the latest update
+    of its metadata, excluding transactions with names 'safeTransferFrom',
     'approve' and 'transferFrom'.
 
-    TODO(Andrey): This function is not perfect, it may return tokens that have not been updated.
+    TODO(Andrey): Query is not perfect, it may return tokens that have not been updated.
     One way for improvements it's get opcodes for all transactions and check if they update metadata storage.
     Required integration with entity API and opcodes crawler.
     """
@@ -163,10 +118,41 @@ def get_tokens_id_wich_may_updated(
 
     table = label_model.__tablename__
 
-    tokens = db_session.execute(
+    metadata_for_parsing = db_session.execute(
         text(
             """
-        with token_id_latest_events as (
+        with token_uris as (
+            SELECT
+                DISTINCT ON(label_data -> 'inputs'-> 0 ) label_data -> 'inputs'-> 0 as token_id,
+                label_data -> 'inputs' ->> 0 as token_id_text,
+                label_data -> 'result' as token_uri,
+                block_number as block_number,
+                block_timestamp as block_timestamp,
+                address as address
+            FROM
+                {}
+            WHERE
+                label = :view_state_label
+                AND address = :address
+                AND label_data ->> 'name' = :name
+            ORDER BY
+                label_data -> 'inputs'-> 0 ASC,
+                block_number :: INT DESC
+        ),
+        metadata_state as (
+            SELECT
+                DISTINCT ON(label_data ->> 'token_id') label_data ->> 'token_id' as token_id,
+                block_timestamp
+            FROM
+                {}
+            WHERE
+                address = :address
+                AND label = :metadata_label
+            ORDER BY
+                label_data ->> 'token_id' ASC,
+                block_number :: INT DESC
+        ),
+        token_id_latest_events as (
             SELECT
                 DISTINCT ON (
                     label_data -> 'args' ->> 'tokenId',
@@ -192,38 +178,63 @@ def get_tokens_id_wich_may_updated(
                 block_timestamp :: INT DESC,
                 log_index :: INT DESC
         ),
-        metadata_state as (
+        maybe_updated as (
             SELECT
-                DISTINCT ON(label_data ->> 'token_id') label_data ->> 'token_id' as token_id,
-                block_timestamp
-            FROM
-                {}
-            WHERE
-                address = :address
-                AND label = :metadata_label
+                token_id
+            FROM (
+                SELECT
+                    distinct token_id_latest_events.token_id
+                FROM
+                    token_id_latest_events
+                    JOIN metadata_state ON token_id_latest_events.token_id = metadata_state.token_id
+                WHERE
+                    token_id_latest_events.block_timestamp > metadata_state.block_timestamp
+            ) as updated_tokens
             ORDER BY
-                label_data ->> 'token_id' ASC,
-                block_number :: INT DESC
+                random()
+            LIMIT :max_recrawl
         )
         SELECT
-            distinct token_id_latest_events.token_id
+            token_uris.token_id,
+            token_uris.token_uri,
+            token_uris.block_number,
+            token_uris.block_timestamp,
+            token_uris.address
         FROM
-            token_id_latest_events
-            JOIN metadata_state ON token_id_latest_events.token_id = metadata_state.token_id
+            token_uris
         WHERE
-            token_id_latest_events.block_timestamp > metadata_state.block_timestamp 
+            NOT EXISTS (
+                SELECT 1 FROM metadata_state WHERE metadata_state.token_id = token_uris.token_id_text
+            )
+            OR EXISTS (
+                SELECT 1 FROM maybe_updated WHERE maybe_updated.token_id = token_uris.token_id_text
+            )
         """.format(
-                table, table
+                table, table, table
             )
-        ),
+        ).execution_options(stream_results=True),
         {
             "address": address,
+            "name": "tokenURI",
+            "max_recrawl": max_recrawl,
+            "view_state_label": VIEW_STATE_CRAWLER_LABEL,
             "metadata_label": METADATA_CRAWLER_LABEL,
             "moonworm_label": CRAWLER_LABEL,
         },
     )
 
-    result = [data[0] for data in tokens]
+    result = []
+    for data in metadata_for_parsing.yield_per(yield_per):
+        if data[1] is not None and len(data[1]) > 0:
+            result.append(
+                TokenURIs(
+                    token_id=data[0],
+                    token_uri=data[1][0],
+                    block_number=data[2],
+                    block_timestamp=data[3],
+                    address=data[4],
+                )
+            )
 
     return result
 
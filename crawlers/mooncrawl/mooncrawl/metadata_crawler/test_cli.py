@@ -0,0 +1,272 @@
+import asyncio
+import queue
+import tempfile
+import threading
+import unittest
+from typing import Any, List
+from unittest import mock
+
+import diskcache  # type: ignore
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+from moonstreamdb.blockchain import AvailableBlockchainType
+
+from ..data import TokenURIs
+from . import cli
+
+
+class TestResolveUriMirrors(unittest.TestCase):
+    def test_ipfs_uri(self):
+        self.assertListEqual(
+            cli.resolve_uri_mirrors("ipfs://QmHash/1.json"),
+            [
+                "https://ipfs.io/ipfs/QmHash/1.json",
+                "https://cloudflare-ipfs.com/ipfs/QmHash/1.json",
+            ],
+        )
+
+    def test_ipfs_uri_with_ipfs_path(self):
+        self.assertListEqual(
+            cli.resolve_uri_mirrors("ipfs://ipfs/QmHash/1.json"),
+            [
+                "https://ipfs.io/ipfs/QmHash/1.json",
+                "https://cloudflare-ipfs.com/ipfs/QmHash/1.json",
+            ],
+        )
+
+    def test_arweave_uri(self):
+        self.assertListEqual(
+            cli.resolve_uri_mirrors("ar://TxId/1.json"),
+            ["https://arweave.net/TxId/1.json"],
+        )
+
+    def test_https_uri(self):
+        self.assertListEqual(
+            cli.resolve_uri_mirrors("https://example.com/token/1"),
+            ["https://example.com/token/1"],
+        )
+
+
+class TestFetchJson(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        async def small(request: web.Request) -> web.StreamResponse:
+            return web.json_response({"name": "Token 1"})
+
+        async def large_content_length(request: web.Request) -> web.StreamResponse:
+            return web.Response(body=b" " * (cli.METADATA_MAX_SIZE_BYTES + 1))
+
+        async def large_chunked(request: web.Request) -> web.StreamResponse:
+            response = web.StreamResponse()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            for _ in range(cli.METADATA_MAX_SIZE_BYTES // (64 * 1024) + 1):
+                await response.write(b" " * (64 * 1024))
+            await response.write_eof()
+            return response
+
+        async def not_found(request: web.Request) -> web.StreamResponse:
+            return web.Response(status=404)
+
+        app = web.Application()
+        app.router.add_get("/small", small)
+        app.router.add_get("/large-content-length", large_content_length)
+        app.router.add_get("/large-chunked", large_chunked)
+        app.router.add_get("/not-found", not_found)
+
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = ClientSession()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.close()
+
+    async def fetch(self, path: str) -> Any:
+        return await cli.fetch_json(self.session, str(self.server.make_url(path)))
+
+    async def test_small_response(self):
+        self.assertDictEqual(await self.fetch("/small"), {"name": "Token 1"})
+
+    async def test_large_content_length(self):
+        self.assertIsNone(await self.fetch("/large-content-length"))
+
+    async def test_large_chunked_response(self):
+        self.assertIsNone(await self.fetch("/large-chunked"))
+
+    async def test_not_found(self):
+        self.assertIsNone(await self.fetch("/not-found"))
+
+
+class TestLoadsMetadata(unittest.TestCase):
+    def test_large_integers_kept_exact(self):
+        metadata = cli.loads_metadata(
+            b'{"id": 123456789012345678901234567890, "attributes": [{"value": -9223372036854775809}]}'
+        )
+        self.assertEqual(metadata["id"], 123456789012345678901234567890)
+        self.assertIsInstance(metadata["id"], int)
+        self.assertEqual(metadata["attributes"][0]["value"], -9223372036854775809)
+
+    def test_regular_metadata(self):
+        self.assertDictEqual(
+            cli.loads_metadata(b'{"name": "Token 1", "id": 18446744073709, "x": 0.5}'),
+            {"name": "Token 1", "id": 18446744073709, "x": 0.5},
+        )
+
+
+class TestRaceFetchJson(unittest.IsolatedAsyncioTestCase):
+    async def test_first_not_none_result_wins_and_others_cancelled(self):
+        cancelled: List[str] = []
+
+        async def fake_fetch_json(session: Any, url: str) -> Any:
+            if url == "empty":
+                return None
+            if url == "fast":
+                await asyncio.sleep(0.01)
+                return {"name": "fast"}
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+            return {"name": "slow"}
+
+        with mock.patch.object(cli, "fetch_json", fake_fetch_json):
+            result = await cli.race_fetch_json(None, ["slow", "empty", "fast"])
+
+        self.assertDictEqual(result, {"name": "fast"})
+        self.assertListEqual(cancelled, ["slow"])
+
+    async def test_all_failed(self):
+        async def fake_fetch_json(session: Any, url: str) -> Any:
+            if url == "error":
+                raise Exception("connection reset")
+            return None
+
+        with mock.patch.object(cli, "fetch_json", fake_fetch_json):
+            result = await cli.race_fetch_json(None, ["error", "empty"])
+
+        self.assertIsNone(result)
+
+
+class TestCrawlUriCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = diskcache.Cache(self.cache_dir.name)
+
+    def tearDown(self):
+        self.cache.close()
+        self.cache_dir.cleanup()
+
+    async def crawl(self, metadata_uri: str) -> Any:
+        async def fake_race_fetch_json(session: Any, urls: List[str]) -> Any:
+            return {"name": metadata_uri}
+
+        with mock.patch.object(cli, "_uri_cache", self.cache), mock.patch.object(
+            cli, "race_fetch_json", fake_race_fetch_json
+        ):
+            return await cli.crawl_uri_async(None, metadata_uri)
+
+    async def test_content_addressed_uris_cached(self):
+        for metadata_uri in ["ipfs://QmHash/1.json", "ar://TxId/1.json"]:
+            result = await self.crawl(metadata_uri)
+            self.assertDictEqual(result, {"name": metadata_uri})
+            self.assertDictEqual(self.cache.get(metadata_uri), {"name": metadata_uri})
+
+    async def test_http_uris_not_cached(self):
+        metadata_uri = "https://example.com/token/1"
+        result = await self.crawl(metadata_uri)
+        self.assertDictEqual(result, {"name": metadata_uri})
+        self.assertIsNone(self.cache.get(metadata_uri))
+
+    async def test_cached_result_returned_without_request(self):
+        metadata_uri = "ipfs://QmHash/1.json"
+        self.cache.set(metadata_uri, {"name": "cached"})
+        result = await self.crawl(metadata_uri)
+        self.assertDictEqual(result, {"name": "cached"})
+
+
+class TestWriterQueue(unittest.TestCase):
+    def test_put_to_stopped_writer_raises(self):
+        writer = threading.Thread(target=lambda: None)
+        writer.start()
+        writer.join()
+
+        write_queue: "queue.Queue[Any]" = queue.Queue(maxsize=1)
+        write_queue.put(None)
+        writer_error = Exception("database is down")
+
+        with self.assertRaises(Exception) as context:
+            cli.put_to_writer(write_queue, writer, [writer_error], None)
+        self.assertIs(context.exception.__cause__, writer_error)
+
+    def test_writer_actions(self):
+        write_queue: "queue.Queue[Any]" = queue.Queue()
+        write_queue.put((cli.WriterAction.WRITE_LABELS, "0x123", ["label"]))
+        write_queue.put((cli.WriterAction.WRITE_LABELS, "0x123", []))
+        write_queue.put((cli.WriterAction.CLEAN_LABELS, "0x123", []))
+        write_queue.put(None)
+        writer_errors: List[Exception] = []
+
+        with mock.patch.object(cli, "PrePing_SessionLocal"), mock.patch.object(
+            cli, "write_labels_chunk"
+        ) as write_labels_chunk, mock.patch.object(
+            cli, "clean_address_labels"
+        ) as clean_address_labels:
+            cli.db_writer(write_queue, mock.sentinel.blockchain_type, writer_errors)
+
+        self.assertEqual(write_labels_chunk.call_count, 1)
+        self.assertEqual(clean_address_labels.call_count, 1)
+        self.assertListEqual(writer_errors, [])
+
+    def test_writer_error_recorded(self):
+        write_queue: "queue.Queue[Any]" = queue.Queue()
+        write_queue.put((cli.WriterAction.WRITE_LABELS, "0x123", ["label"]))
+        writer_errors: List[Exception] = []
+        writer_error = Exception("database is down")
+
+        with mock.patch.object(cli, "PrePing_SessionLocal"), mock.patch.object(
+            cli, "write_labels_chunk", side_effect=writer_error
+        ):
+            cli.db_writer(write_queue, mock.sentinel.blockchain_type, writer_errors)
+
+        self.assertListEqual(writer_errors, [writer_error])
+
+
+class TestLabelsFromMetadatas(unittest.TestCase):
+    def test_failed_fetch_labeled_with_empty_metadata(self):
+        requests_chunk = [
+            TokenURIs(
+                token_id="1",
+                token_uri="https://example.com/token/1",
+                block_number="10",
+                block_timestamp="1000",
+                address="0x123",
+            ),
+            TokenURIs(
+                token_id="2",
+                token_uri="https://example.com/token/2",
+                block_number="10",
+                block_timestamp="1000",
+                address="0x123",
+            ),
+        ]
+        metadatas = [{"name": "Token 1"}, Exception("connection reset")]
+
+        labels = cli.labels_from_metadatas(
+            AvailableBlockchainType.POLYGON, requests_chunk, metadatas
+        )
+
+        self.assertEqual(len(labels), 2)
+        self.assertDictEqual(
+            labels[0].label_data,
+            {"type": "metadata", "token_id": "1", "metadata": {"name": "Token 1"}},
+        )
+        self.assertDictEqual(
+            labels[1].label_data,
+            {"type": "metadata", "token_id": "2", "metadata": None},
+        )
+        self.assertEqual(labels[1].address, "0x123")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -54,6 +54,11 @@ CRAWLER_LABEL = "moonworm-alpha"
 VIEW_STATE_CRAWLER_LABEL = "view-state-alpha"
 METADATA_CRAWLER_LABEL = "metadata-crawler"
 
+# Metadata crawler cache of fetched content addressed (ipfs://, ar://) URIs
+MOONSTREAM_METADATA_CACHE_DIR = os.environ.get(
+    "MOONSTREAM_METADATA_CACHE_DIR", "/var/cache/mooncrawl/uri"
+)
+
 MOONSTREAM_STATE_CRAWLER_DB_STATEMENT_TIMEOUT_MILLIS = 30000
 MOONSTREAM_STATE_CRAWLER_DB_STATEMENT_TIMEOUT_MILLIS_RAW = os.environ.get(
     "MOONSTREAM_QUERY_API_DB_STATEMENT_TIMEOUT_MILLIS"
@@ -33,15 +33,18 @@ setup(
     package_data={"mooncrawl": ["py.typed"]},
     zip_safe=False,
     install_requires=[
+        "aiohttp",
         "boto3",
         "bugout>=0.2.8",
         "chardet",
+        "diskcache",
         "fastapi",
-        "moonstreamdb>=0.3.3",
+        "moonstreamdb>=0.3.4",
         "moonstream>=0.1.1",
         "moonstream-entity>=0.0.5",
         "moonworm[moonstream]>=0.6.2",
         "humbug",
+        "orjson",
         "pydantic==1.9.2",
         "python-dateutil",
         "requests",
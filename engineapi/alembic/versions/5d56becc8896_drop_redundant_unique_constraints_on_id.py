@@ -0,0 +1,68 @@
+"""Drop redundant unique constraints on primary keys
+
+Revision ID: 5d56becc8896
+Revises: e0b31d681adf
+Create Date: 2026-10-15 12:47:19.203576
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5d56becc8896"
+down_revision = "e0b31d681adf"
+branch_labels = None
+depends_on = None
+
+
+TABLES = [
+    "dropper_contracts",
+    "dropper_claims",
+    "dropper_claimants",
+    "registered_contracts",
+    "call_requests",
+    "leaderboards",
+    "leaderboard_scores",
+]
+
+# Foreign keys could depend on unique index of referred id instead of primary key,
+# so they are recreated to be bound to primary key
+# (table, column, referred table)
+FOREIGN_KEYS = [
+    ("dropper_claims", "dropper_contract_id", "dropper_contracts"),
+    ("dropper_claimants", "dropper_claim_id", "dropper_claims"),
+    ("call_requests", "registered_contract_id", "registered_contracts"),
+    ("leaderboard_scores", "leaderboard_id", "leaderboards"),
+]
+
+
+def drop_foreign_keys():
+    for table, column, referred_table in FOREIGN_KEYS:
+        op.drop_constraint(
+            op.f(f"fk_{table}_{column}_{referred_table}"), table, type_="foreignkey"
+        )
+
+
+def create_foreign_keys():
+    for table, column, referred_table in FOREIGN_KEYS:
+        op.create_foreign_key(
+            op.f(f"fk_{table}_{column}_{referred_table}"),
+            table,
+            referred_table,
+            [column],
+            ["id"],
+            ondelete="CASCADE",
+        )
+
+
+def upgrade():
+    drop_foreign_keys()
+    for table in TABLES:
+        op.drop_constraint(op.f(f"uq_{table}_id"), table, type_="unique")
+    create_foreign_keys()
+
+
+def downgrade():
+    for table in TABLES:
+        op.create_unique_constraint(op.f(f"uq_{table}_id"), table, ["id"])
@@ -0,0 +1,35 @@
+"""GIN indexes on call_requests parameters and leaderboard_scores points_data
+
+Revision ID: 822a793614be
+Revises: dedd8a7d0624
+Create Date: 2026-10-15 12:21:47.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "822a793614be"
+down_revision = "dedd8a7d0624"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY could not run inside transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_call_requests_parameters ON call_requests USING gin (parameters jsonb_path_ops);"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_leaderboard_scores_points_data ON leaderboard_scores USING gin (points_data jsonb_path_ops) WHERE points_data IS NOT NULL;"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_leaderboard_scores_points_data;"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_call_requests_parameters;")
@@ -0,0 +1,50 @@
+"""Generate primary key UUIDs on database side
+
+Revision ID: e0b31d681adf
+Revises: 822a793614be
+Create Date: 2026-10-15 12:34:02.671945
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "e0b31d681adf"
+down_revision = "822a793614be"
+branch_labels = None
+depends_on = None
+
+
+TABLES = [
+    "dropper_contracts",
+    "dropper_claims",
+    "dropper_claimants",
+    "registered_contracts",
+    "call_requests",
+    "leaderboards",
+    "leaderboard_scores",
+]
+
+
+def upgrade():
+    # gen_random_uuid() is built in since Postgres 13, pgcrypto provides it for older versions
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto;")
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "id",
+            existing_type=postgresql.UUID(as_uuid=True),
+            server_default=sa.text("gen_random_uuid()"),
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "id",
+            existing_type=postgresql.UUID(as_uuid=True),
+            server_default=None,
+        )
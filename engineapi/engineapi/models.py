@@ -1,5 +1,3 @@
-import uuid
-
 from sqlalchemy import (
     VARCHAR,
     BigInteger,
@@ -15,7 +13,7 @@ from sqlalchemy import (
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import and_, expression
+from sqlalchemy.sql import and_, expression, text
 
 """
 Naming conventions doc
@@ -57,8 +55,7 @@ class DropperContract(Base):  # type: ignore
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
         nullable=False,
     )
     blockchain = Column(VARCHAR(128), nullable=False)
@@ -84,8 +81,7 @@ class DropperClaim(Base):  # type: ignore
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
         nullable=False,
     )
     dropper_contract_id = Column(
@@ -129,8 +125,7 @@ class DropperClaimant(Base):  # type: ignore
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
         nullable=False,
     )
     dropper_claim_id = Column(
@@ -169,8 +164,7 @@ class RegisteredContract(Base):  # type: ignore
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
     )
     blockchain = Column(VARCHAR(128), nullable=False, index=True)
     address = Column(VARCHAR(256), nullable=False, index=True)
@@ -194,12 +188,19 @@ class RegisteredContract(Base):  # type: ignore
 
 class CallRequest(Base):
     __tablename__ = "call_requests"
+    __table_args__ = (
+        Index(
+            "ix_call_requests_parameters",
+            "parameters",
+            postgresql_using="gin",
+            postgresql_ops={"parameters": "jsonb_path_ops"},
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
         nullable=False,
     )
 
@@ -239,8 +240,7 @@ class Leaderboard(Base):  # type: ignore
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
         nullable=False,
     )
     title = Column(VARCHAR(128), nullable=False)
@@ -259,13 +259,21 @@ class Leaderboard(Base):  # type: ignore
 
 class LeaderboardScores(Base):  # type: ignore
     __tablename__ = "leaderboard_scores"
-    __table_args__ = (UniqueConstraint("leaderboard_id", "address"),)
+    __table_args__ = (
+        UniqueConstraint("leaderboard_id", "address"),
+        Index(
+            "ix_leaderboard_scores_points_data",
+            "points_data",
+            postgresql_using="gin",
+            postgresql_ops={"points_data": "jsonb_path_ops"},
+            postgresql_where=text("points_data IS NOT NULL"),
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        default=uuid.uuid4,
-        unique=True,
+        server_default=text("gen_random_uuid()"),
         nullable=False,
     )
     leaderboard_id = Column(
@@ -0,0 +1,40 @@
+"""Partial index for metadata crawler labels
+
+Revision ID: 735afa6ec45b
+Revises: c413d5265f76
+Create Date: 2026-10-15 12:04:11.532408
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "735afa6ec45b"
+down_revision = "c413d5265f76"
+branch_labels = None
+depends_on = None
+
+
+METADATA_LABELS_TABLES = ["polygon_labels", "mumbai_labels"]
+
+
+def upgrade():
+    # CONCURRENTLY could not run inside transaction
+    with op.get_context().autocommit_block():
+        for table in METADATA_LABELS_TABLES:
+            op.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_address_metadata_token_id ON {table} USING BTREE (address,(label_data->>'token_id'),block_number) WHERE label='metadata-crawler';
+                """
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in METADATA_LABELS_TABLES:
+            op.execute(
+                f"""
+                DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_address_metadata_token_id;
+                """
+            )
@@ -3,7 +3,7 @@ Moonstream database connection.
 """
 from contextlib import contextmanager
 import os
-from typing import Generator
+from typing import Any, Generator
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
@@ -41,15 +41,21 @@ except:
 
 
 def create_moonstream_engine(
-    url: str, pool_size: int, statement_timeout: int, pool_pre_ping: bool = False
+    url: str,
+    pool_size: int,
+    statement_timeout: int,
+    pool_pre_ping: bool = False,
+    **engine_kwargs: Any,
 ):
     # Pooling: https://docs.sqlalchemy.org/en/14/core/pooling.html#sqlalchemy.pool.QueuePool
     # Statement timeout: https://stackoverflow.com/a/44936982
+    # Extra engine_kwargs (e.g. psycopg2 executemany options) are passed to create_engine as is
     return create_engine(
         url=url,
         pool_pre_ping=pool_pre_ping,
         pool_size=pool_size,
         connect_args={"options": f"-c statement_timeout={statement_timeout}"},
+        **engine_kwargs,
     )
 
 
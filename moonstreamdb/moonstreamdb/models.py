@@ -14,7 +14,7 @@ from sqlalchemy import (
     VARCHAR,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.sql import expression
+from sqlalchemy.sql import expression, text
 from sqlalchemy.ext.compiler import compiles
 
 """
@@ -244,6 +244,14 @@ class PolygonLabel(Base):  # type: ignore
             "block_timestamp",
             unique=False,
         ),
+        Index(
+            "ix_polygon_labels_address_metadata_token_id",
+            "address",
+            text("(label_data->>'token_id')"),
+            "block_number",
+            unique=False,
+            postgresql_where=text("label='metadata-crawler'"),
+        ),
     )
 
     id = Column(
@@ -350,6 +358,14 @@ class MumbaiLabel(Base):  # type: ignore
             "block_timestamp",
             unique=False,
         ),
+        Index(
+            "ix_mumbai_labels_address_metadata_token_id",
+            "address",
+            text("(label_data->>'token_id')"),
+            "block_number",
+            unique=False,
+            postgresql_where=text("label='metadata-crawler'"),
+        ),
     )
 
     id = Column(